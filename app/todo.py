@@ -1,11 +1,40 @@
 import argparse
+import gzip
+import hashlib
 import json
+import lzma
 import os
+import shutil
 import sys
+import tempfile
+import zlib
 
 TASKS_FILE = 'tasks.json'
 CONFIG_FILE = 'config.json'
 
+# Compression codecs, selected by the data file's extension
+COMPRESSION_SUFFIXES = {'gzip': '.gz', 'xz': '.xz', 'zstd': '.zst'}
+
+class CompressionUnavailableError(Exception):
+    """Raised when a data file needs a codec that is not installed"""
+
+def _zstd_errors():
+    errors = ()
+    try:
+        from compression import zstd
+        errors += (zstd.ZstdError,)
+    except ImportError:
+        pass
+    try:
+        import zstandard
+        errors += (zstandard.ZstdError,)
+    except ImportError:
+        pass
+    return errors
+
+# Errors raised when a data file cannot be read or decoded by its codec
+DATA_FILE_ERRORS = (OSError, EOFError, zlib.error, lzma.LZMAError, CompressionUnavailableError) + _zstd_errors()
+
 def load_config():
     """Load configuration from config.json"""
     if not os.path.exists(CONFIG_FILE):
@@ -28,44 +57,272 @@ def get_tasks_file():
     config = load_config()
     return config.get('tasks_file', TASKS_FILE)
 
-def load_tasks():
+def get_compression(filepath):
+    """Get the compression codec name for a data file, or None if uncompressed"""
+    for name, suffix in COMPRESSION_SUFFIXES.items():
+        if filepath.endswith(suffix):
+            return name
+    return None
+
+def strip_compression_suffix(filepath):
+    """Remove a compression extension from a data file path"""
+    compression = get_compression(filepath)
+    if compression is None:
+        return filepath
+    return filepath[:-len(COMPRESSION_SUFFIXES[compression])]
+
+def _zstd_open():
+    try:
+        from compression import zstd  # Python 3.14+
+        return zstd.open
+    except ImportError:
+        pass
+    try:
+        import zstandard
+        return zstandard.open
+    except ImportError:
+        raise CompressionUnavailableError("zstd compression requires Python 3.14+ or the 'zstandard' package")
+
+def open_data_file(filepath, mode='r'):
+    """Open a data file, streaming through the codec matching its extension"""
+    compression = get_compression(filepath)
+    if compression is None:
+        return open(filepath, mode)
+    if 'b' not in mode and 't' not in mode:
+        # Codec openers default to binary mode
+        mode += 't'
+    if compression == 'gzip':
+        return gzip.open(filepath, mode)
+    if compression == 'xz':
+        return lzma.open(filepath, mode)
+    return _zstd_open()(filepath, mode)
+
+def temp_path_beside(filepath):
+    """Create an empty temporary file next to filepath, keeping its extensions"""
+    fd, temp_path = tempfile.mkstemp(
+        dir=os.path.dirname(os.path.abspath(filepath)),
+        prefix='.tmp-',
+        suffix='-' + os.path.basename(filepath),
+    )
+    os.close(fd)
+    return temp_path
+
+def copy_data_file(source, destination):
+    """Copy a data file, re-encoding it if the two paths use different codecs
+
+    The copy is written beside the destination and moved into place only once
+    complete, so a decode error never leaves a partial destination file.
+    """
+    temp_path = temp_path_beside(destination)
+    try:
+        if get_compression(source) == get_compression(destination):
+            shutil.copyfile(source, temp_path)
+        else:
+            with open_data_file(source, 'rb') as fin, open_data_file(temp_path, 'wb') as fout:
+                shutil.copyfileobj(fin, fout)
+        # mkstemp creates owner-only files; keep the usual permissions instead
+        shutil.copymode(destination if os.path.exists(destination) else source, temp_path)
+        os.replace(temp_path, destination)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+def encode_tasks(tasks):
+    """Encode tasks for storage, keeping each category name once in a dictionary
+
+    Tasks refer to their category by its position in the 'categories' list.
+    """
+    codes = {}
+    encoded = []
+    for task in tasks:
+        task = dict(task)
+        if 'category' in task:
+            task['category'] = codes.setdefault(task['category'], len(codes))
+        encoded.append(task)
+    return {'categories': list(codes), 'tasks': encoded}
+
+def decode_tasks(data, category=None):
+    """Decode stored tasks, optionally keeping only one category (case-insensitive)
+
+    Accepts both the category dictionary format and plain task lists, such as
+    the files under data/.
+    """
+    if isinstance(data, list):
+        if category is None:
+            return data
+        key = category_key(category)
+        return [t for t in data if category_key(task_category(t)) == key]
+    try:
+        names = data['categories']
+        tasks = data['tasks']
+        if category is not None:
+            # Match on the dictionary once, then compare integer codes per task
+            key = category_key(category)
+            codes = {code for code, name in enumerate(names) if category_key(name) == key}
+            missing = key == category_key(task_category({}))
+            tasks = [t for t in tasks if (t['category'] in codes if 'category' in t else missing)]
+        decoded = []
+        for task in tasks:
+            task = dict(task)
+            if 'category' in task:
+                task['category'] = names[task['category']]
+            decoded.append(task)
+        return decoded
+    except (KeyError, IndexError, TypeError) as e:
+        raise ValueError(f"malformed tasks file: {e!r}")
+
+def dump_tasks(tasks, f):
+    """Write tasks in the category dictionary format, one task per line"""
+    data = encode_tasks(tasks)
+    f.write('{\n  "categories": ' + json.dumps(data['categories']) + ',\n  "tasks": [\n')
+    f.write(',\n'.join('    ' + json.dumps(task) for task in data['tasks']))
+    f.write('\n  ]\n}\n')
+
+def read_tasks_file(tasks_file, category=None):
+    """Read and decode a tasks file, raising if it cannot be read"""
+    with open_data_file(tasks_file, 'r') as f:
+        return decode_tasks(json.load(f), category)
+
+def load_tasks(category=None):
     tasks_file = get_tasks_file()
     if not os.path.exists(tasks_file):
         return []
-    with open(tasks_file, 'r') as f:
-        return json.load(f)
+    try:
+        return read_tasks_file(tasks_file, category)
+    except (ValueError,) + DATA_FILE_ERRORS as e:
+        print(f"Error: cannot read tasks file {tasks_file}: {e}")
+        sys.exit(1)
 
-def save_tasks(tasks):
+def save_tasks(tasks, index=None):
+    """Save tasks, refreshing the category index when one is given"""
     tasks_file = get_tasks_file()
-    with open(tasks_file, 'w') as f:
-        json.dump(tasks, f, indent=2)
+    with open_data_file(tasks_file, 'w') as f:
+        dump_tasks(tasks, f)
+    if index is not None:
+        save_category_index(index, tasks_file)
+
+def task_category(task):
+    """Get a task's category, treating a missing one as 'Unknown'"""
+    return task.get('category', 'Unknown')
+
+def category_key(category):
+    """Case-fold a category name for lookups in the category index"""
+    return category.casefold()
+
+def get_categories_file(tasks_file=None):
+    """Get the category index path stored alongside a tasks file"""
+    return (tasks_file or get_tasks_file()) + '.categories.json'
+
+def _file_signature(filepath):
+    """Size and hash of a file's bytes on disk, used to spot a stale category index
+
+    Hashing the raw (possibly compressed) bytes is much cheaper than decoding
+    and parsing them, and unlike mtime it catches edits made by copies that
+    preserve timestamps.
+    """
+    digest = hashlib.sha256()
+    with open(filepath, 'rb') as f:
+        for chunk in iter(lambda: f.read(65536), b''):
+            digest.update(chunk)
+    return [os.path.getsize(filepath), digest.hexdigest()]
+
+def update_category_index(index, category, delta):
+    """Adjust the cached task count for a category"""
+    key = category_key(category)
+    entry = index['categories'].get(key)
+    if entry is None:
+        if delta <= 0:
+            return
+        entry = {'name': category, 'count': 0}
+        index['categories'][key] = entry
+    entry['count'] += delta
+    if entry['count'] <= 0:
+        del index['categories'][key]
+
+def build_category_index(tasks):
+    """Build the category count cache from a task list"""
+    index = {'categories': {}}
+    for task in tasks:
+        update_category_index(index, task_category(task), 1)
+    return index
+
+def save_category_index(index, tasks_file=None):
+    """Save the category index, stamped with the current state of its tasks file"""
+    tasks_file = tasks_file or get_tasks_file()
+    index['source'] = _file_signature(tasks_file)
+    with open(get_categories_file(tasks_file), 'w') as f:
+        json.dump(index, f, indent=2)
+
+def read_category_index(tasks_file=None):
+    """Read the saved category index, or None if it is missing or out of date"""
+    tasks_file = tasks_file or get_tasks_file()
+    categories_file = get_categories_file(tasks_file)
+    if not os.path.exists(categories_file):
+        return None
+    try:
+        with open(categories_file, 'r') as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(index, dict) or index.get('source') != _file_signature(tasks_file):
+        return None
+    return index
+
+def load_category_index(tasks_file=None, tasks=None):
+    """Load the category index for a tasks file, rebuilding it in memory if the file changed
+
+    Only commands that write the tasks file persist the index, so read-only
+    commands never write next to it.
+    """
+    tasks_file = tasks_file or get_tasks_file()
+    if not os.path.exists(tasks_file):
+        return {'categories': {}}
+    index = read_category_index(tasks_file)
+    if index is not None:
+        return index
+    # The tasks file was replaced or edited outside the app
+    if tasks is None:
+        tasks = read_tasks_file(tasks_file)
+    return build_category_index(tasks)
 
 def add_task(description, category):
     tasks = load_tasks()
+    index = load_category_index(tasks=tasks)
     task_id = max([t['id'] for t in tasks], default=0) + 1
     task = {'id': task_id, 'description': description, 'category': category}
     tasks.append(task)
-    save_tasks(tasks)
+    update_category_index(index, category, 1)
+    save_tasks(tasks, index)
     print(f"Added task {task_id}: {description} [{category}]")
 
 def remove_task(task_id):
     tasks = load_tasks()
+    index = load_category_index(tasks=tasks)
     new_tasks = [t for t in tasks if t['id'] != task_id]
     if len(new_tasks) == len(tasks):
         print(f"Task {task_id} not found.")
     else:
-        save_tasks(new_tasks)
+        for t in tasks:
+            if t['id'] == task_id:
+                update_category_index(index, task_category(t), -1)
+        save_tasks(new_tasks, index)
         print(f"Removed task {task_id}.")
 
 def list_tasks(category=None):
-    tasks = load_tasks()
     if category:
-        tasks = [t for t in tasks if t['category'].lower() == category.lower()]
+        index = read_category_index() if os.path.exists(get_tasks_file()) else None
+        # Categories with no tasks are answered from the index without reading any tasks
+        if index is not None and category_key(category) not in index['categories']:
+            print("No tasks found.")
+            return
+        tasks = load_tasks(category)
+    else:
+        tasks = load_tasks()
     if not tasks:
         print("No tasks found.")
         return
     for t in tasks:
-        print(f"{t['id']}: {t['description']} [{t['category']}]" )
+        print(f"{t['id']}: {t['description']} [{task_category(t)}]" )
 
 def configure_app(setting=None, value=None):
     """Configure application settings"""
@@ -75,6 +332,7 @@ def configure_app(setting=None, value=None):
         # Show current configuration
         print("Current Configuration:")
         print(f"  Tasks file: {config.get('tasks_file', 'tasks.json')}")
+        print(f"  Compression: {get_compression(config.get('tasks_file', 'tasks.json')) or 'none'}")
         print(f"  Default categories: {', '.join(config.get('default_categories', []))}")
         print(f"  Auto backup: {config.get('auto_backup', True)}")
         print(f"  Backup count: {config.get('backup_count', 5)}")
@@ -88,10 +346,60 @@ def configure_app(setting=None, value=None):
     if setting == 'tasks_file':
         config['tasks_file'] = value
         print(f"Tasks file set to: {value}")
+    elif setting == 'compression':
+        if value != 'none' and value not in COMPRESSION_SUFFIXES:
+            print(f"Error: compression must be one of: none, {', '.join(COMPRESSION_SUFFIXES)}")
+            return
+        if value == 'zstd':
+            try:
+                _zstd_open()
+            except CompressionUnavailableError as e:
+                print(f"Error: {e}")
+                return
+        old_file = config.get('tasks_file', TASKS_FILE)
+        new_file = strip_compression_suffix(old_file) + COMPRESSION_SUFFIXES.get(value, '')
+        if new_file != old_file and os.path.exists(old_file):
+            if os.path.exists(new_file):
+                print(f"Error: {new_file} already exists; move it aside before converting")
+                return
+            temp_file = temp_path_beside(new_file)
+            try:
+                copy_data_file(old_file, temp_file)
+                read_tasks_file(temp_file)
+                shutil.copymode(old_file, temp_file)
+                os.replace(temp_file, new_file)
+            except (ValueError,) + DATA_FILE_ERRORS as e:
+                print(f"Error: could not convert {old_file}: {e}")
+                return
+            finally:
+                if os.path.exists(temp_file):
+                    os.remove(temp_file)
+            # The converted copy reads back cleanly, so the original can go
+            for stale_file in (old_file, get_categories_file(old_file)):
+                if os.path.exists(stale_file):
+                    os.remove(stale_file)
+            print(f"Converted {old_file} to {new_file}")
+        config['tasks_file'] = new_file
+        print(f"Compression set to: {value}")
     elif setting == 'default_categories':
         categories = [cat.strip() for cat in value.split(',')]
+        if not all(categories):
+            print("Error: default_categories cannot contain empty names")
+            return
+        keys = [category_key(cat) for cat in categories]
+        if len(set(keys)) != len(keys):
+            print("Error: default_categories cannot contain duplicates (case-insensitive)")
+            return
+        try:
+            known = load_category_index(config.get('tasks_file', TASKS_FILE))['categories']
+        except (ValueError,) + DATA_FILE_ERRORS as e:
+            known = None
+            print(f"Warning: could not read tasks to check categories: {e}")
         config['default_categories'] = categories
         print(f"Default categories set to: {categories}")
+        unused = [cat for cat, key in zip(categories, keys) if known is not None and key not in known]
+        if unused:
+            print(f"Note: no tasks yet in: {', '.join(unused)}")
     elif setting == 'auto_backup':
         if value.lower() in ['true', 'yes', '1']:
             config['auto_backup'] = True
@@ -115,7 +423,7 @@ def configure_app(setting=None, value=None):
             return
     else:
         print(f"Error: Unknown setting '{setting}'")
-        print("Available settings: tasks_file, default_categories, auto_backup, backup_count")
+        print("Available settings: tasks_file, compression, default_categories, auto_backup, backup_count")
         return
     
     save_config(config)
@@ -127,6 +435,7 @@ def renumber_tasks():
     if not tasks:
         print("No tasks to renumber.")
         return
+    index = load_category_index(tasks=tasks)
     
     # Sort tasks by current ID to maintain order
     tasks.sort(key=lambda x: x['id'])
@@ -135,7 +444,7 @@ def renumber_tasks():
     for i, task in enumerate(tasks, 1):
         task['id'] = i
     
-    save_tasks(tasks)
+    save_tasks(tasks, index)
     print(f"Renumbered {len(tasks)} tasks with sequential IDs (1-{len(tasks)})")
 
 def main():
@@ -5,12 +5,27 @@ Provides utilities for seeding data, resetting states, and managing data files
 """
 
 import json
-import shutil
 import os
 import argparse
+import tempfile
+import time
+
+from app.todo import (
+    COMPRESSION_SUFFIXES,
+    DATA_FILE_ERRORS,
+    CompressionUnavailableError,
+    build_category_index,
+    copy_data_file,
+    dump_tasks,
+    get_compression,
+    get_tasks_file,
+    load_category_index,
+    open_data_file,
+    read_tasks_file,
+    save_category_index,
+)
 
 # Data file paths
-TASKS_FILE = 'tasks.json'
 SEED_FILE = 'data/tasks_seed.json'
 TEST_DATA_FILE = 'data/test_data.json'
 DEMO_FILE = 'data/sample_demo.json'
@@ -18,7 +33,7 @@ DEMO_FILE = 'data/sample_demo.json'
 def load_json_file(filepath):
     """Load JSON data from file"""
     try:
-        with open(filepath, 'r') as f:
+        with open_data_file(filepath, 'r') as f:
             return json.load(f)
     except FileNotFoundError:
         print(f"❌ File not found: {filepath}")
@@ -26,47 +41,66 @@ def load_json_file(filepath):
     except json.JSONDecodeError:
         print(f"❌ Invalid JSON in file: {filepath}")
         return None
+    except DATA_FILE_ERRORS as e:
+        print(f"❌ Cannot read file: {filepath} ({e})")
+        return None
 
 def save_json_file(filepath, data):
     """Save JSON data to file"""
     try:
-        with open(filepath, 'w') as f:
+        with open_data_file(filepath, 'w') as f:
             json.dump(data, f, indent=2)
         print(f"✅ Data saved to: {filepath}")
     except Exception as e:
         print(f"❌ Error saving to {filepath}: {e}")
 
+def index_tasks_file():
+    """Save the category index for a freshly replaced tasks file, so info stays cheap"""
+    tasks_file = get_tasks_file()
+    try:
+        save_category_index(build_category_index(read_tasks_file(tasks_file)), tasks_file)
+    except (ValueError,) + DATA_FILE_ERRORS as e:
+        print(f"⚠️  Could not index {tasks_file}: {e}")
+
 def reset_to_seed():
-    """Reset tasks.json to seed data"""
+    """Reset the tasks file to seed data"""
     if os.path.exists(SEED_FILE):
-        shutil.copy(SEED_FILE, TASKS_FILE)
+        copy_data_file(SEED_FILE, get_tasks_file())
+        index_tasks_file()
         print("✅ Reset to seed data")
     else:
         print(f"❌ Seed file not found: {SEED_FILE}")
 
 def reset_to_test_data():
-    """Reset tasks.json to test data"""
+    """Reset the tasks file to test data"""
     if os.path.exists(TEST_DATA_FILE):
-        shutil.copy(TEST_DATA_FILE, TASKS_FILE)
+        copy_data_file(TEST_DATA_FILE, get_tasks_file())
+        index_tasks_file()
         print("✅ Reset to test data")
     else:
         print(f"❌ Test data file not found: {TEST_DATA_FILE}")
 
 def reset_to_demo_data():
-    """Reset tasks.json to demo data"""
+    """Reset the tasks file to demo data"""
     if os.path.exists(DEMO_FILE):
-        shutil.copy(DEMO_FILE, TASKS_FILE)
+        copy_data_file(DEMO_FILE, get_tasks_file())
+        index_tasks_file()
         print("✅ Reset to demo data")
     else:
         print(f"❌ Demo file not found: {DEMO_FILE}")
 
 def show_data_info():
-    """Show information about all data files"""
+    """Show information about all data files
+
+    The current tasks file is answered from its saved category index when that
+    is up to date. The files under data/ have no saved index and are parsed
+    each time.
+    """
     print("📊 Data Files Information")
     print("=" * 50)
     
     files = [
-        ("Current Tasks", TASKS_FILE),
+        ("Current Tasks", get_tasks_file()),
         ("Seed Data", SEED_FILE),
         ("Test Data", TEST_DATA_FILE),
         ("Demo Data", DEMO_FILE)
@@ -74,35 +108,52 @@ def show_data_info():
     
     for name, filepath in files:
         if os.path.exists(filepath):
-            data = load_json_file(filepath)
-            if data:
-                print(f"{name}: {len(data)} tasks")
-                if len(data) > 0:
-                    categories = set(task.get('category', 'Unknown') for task in data)
-                    print(f"  Categories: {', '.join(sorted(categories))}")
+            try:
+                categories = load_category_index(filepath)['categories'].values()
+            except ValueError:
+                print(f"❌ Invalid JSON in file: {filepath}")
+                continue
+            except DATA_FILE_ERRORS as e:
+                print(f"❌ Cannot read file: {filepath} ({e})")
+                continue
+            total = sum(entry['count'] for entry in categories)
+            if total:
+                print(f"{name}: {total} tasks")
+                names = sorted(f"{entry['name']} ({entry['count']})" for entry in categories)
+                print(f"  Categories: {', '.join(names)}")
         else:
             print(f"{name}: File not found")
 
 def create_backup():
-    """Create a backup of current tasks.json"""
-    if os.path.exists(TASKS_FILE):
-        backup_file = f"tasks_backup_{int(os.path.getmtime(TASKS_FILE))}.json"
-        shutil.copy(TASKS_FILE, backup_file)
+    """Create a backup of the current tasks file, using the same compression"""
+    tasks_file = get_tasks_file()
+    if os.path.exists(tasks_file):
+        suffix = COMPRESSION_SUFFIXES.get(get_compression(tasks_file), '')
+        backup_file = f"tasks_backup_{int(os.path.getmtime(tasks_file))}.json{suffix}"
+        copy_data_file(tasks_file, backup_file)
         print(f"✅ Backup created: {backup_file}")
     else:
-        print("❌ No tasks.json file to backup")
+        print(f"❌ No {tasks_file} file to backup")
 
 def restore_backup(backup_file):
-    """Restore from backup file"""
+    """Restore from backup file, converting to the tasks file's compression"""
     if os.path.exists(backup_file):
-        shutil.copy(backup_file, TASKS_FILE)
+        # Check the backup decodes before it replaces the current tasks
+        try:
+            read_tasks_file(backup_file)
+            copy_data_file(backup_file, get_tasks_file())
+        except (ValueError,) + DATA_FILE_ERRORS as e:
+            print(f"❌ Cannot read file: {backup_file} ({e})")
+            return
+        index_tasks_file()
         print(f"✅ Restored from: {backup_file}")
     else:
         print(f"❌ Backup file not found: {backup_file}")
 
 def list_backups():
     """List available backup files"""
-    backups = [f for f in os.listdir('.') if f.startswith('tasks_backup_') and f.endswith('.json')]
+    extensions = ('.json',) + tuple('.json' + suffix for suffix in COMPRESSION_SUFFIXES.values())
+    backups = [f for f in os.listdir('.') if f.startswith('tasks_backup_') and f.endswith(extensions)]
     if backups:
         print("📁 Available backups:")
         for backup in sorted(backups):
@@ -130,6 +181,66 @@ def show_sample_data():
             if len(data) > 3:
                 print(f"  ... and {len(data) - 3} more tasks")
 
+def _fsync_file(filepath):
+    fd = os.open(filepath, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+def benchmark_compression(repeat=1, rounds=20):
+    """Compare file size and save/load time for each compression codec
+
+    Files are written in the app's own format, next to the configured tasks
+    file so they land on the same disk. Save and Load run against the OS page
+    cache, so they mostly measure the CPU spent encoding and decoding.
+    Save+fsync also waits for the bytes to reach the disk, which is where a
+    smaller file saves I/O.
+    """
+    if repeat < 1 or rounds < 1:
+        print("❌ --repeat and --rounds must be at least 1")
+        return
+    print("⏱️  Compression Benchmark")
+    print("=" * 50)
+    
+    data = []
+    for filepath in (SEED_FILE, TEST_DATA_FILE, DEMO_FILE):
+        data.extend(load_json_file(filepath) or [])
+    data = data * repeat
+    print(f"{len(data)} tasks, {rounds} rounds per codec\n")
+    print(f"{'Codec':<8}{'Size (bytes)':>14}{'Ratio':>8}{'Save (ms)':>12}{'Save+fsync (ms)':>17}{'Load (ms)':>12}")
+    
+    baseline = None
+    tasks_dir = os.path.dirname(os.path.abspath(get_tasks_file()))
+    with tempfile.TemporaryDirectory(dir=tasks_dir, prefix='.benchmark-') as tmpdir:
+        for codec in ['none'] + list(COMPRESSION_SUFFIXES):
+            filepath = os.path.join(tmpdir, 'tasks.json' + COMPRESSION_SUFFIXES.get(codec, ''))
+            try:
+                # Untimed warm-up write, so the first codec does not pay for it
+                with open_data_file(filepath, 'w') as f:
+                    dump_tasks(data, f)
+                start = time.perf_counter()
+                for _ in range(rounds):
+                    with open_data_file(filepath, 'w') as f:
+                        dump_tasks(data, f)
+                save_ms = (time.perf_counter() - start) * 1000 / rounds
+                start = time.perf_counter()
+                for _ in range(rounds):
+                    with open_data_file(filepath, 'w') as f:
+                        dump_tasks(data, f)
+                    _fsync_file(filepath)
+                fsync_ms = (time.perf_counter() - start) * 1000 / rounds
+                start = time.perf_counter()
+                for _ in range(rounds):
+                    read_tasks_file(filepath)
+                load_ms = (time.perf_counter() - start) * 1000 / rounds
+            except CompressionUnavailableError as e:
+                print(f"{codec:<8}skipped: {e}")
+                continue
+            size = os.path.getsize(filepath)
+            baseline = baseline or size
+            print(f"{codec:<8}{size:>14}{baseline / size:>7.1f}x{save_ms:>12.3f}{fsync_ms:>17.3f}{load_ms:>12.3f}")
+
 def main():
     parser = argparse.ArgumentParser(description='Data Management for To-Do Project')
     subparsers = parser.add_subparsers(dest='command', help='Available commands')
@@ -147,6 +258,11 @@ def main():
     subparsers.add_parser('backup', help='Create backup of current tasks')
     subparsers.add_parser('backups', help='List available backups')
     
+    # Benchmark command
+    benchmark_parser = subparsers.add_parser('benchmark', help='Compare compression codecs for task files')
+    benchmark_parser.add_argument('--repeat', type=int, default=1, help='Repeat the sample tasks to simulate larger files')
+    benchmark_parser.add_argument('--rounds', type=int, default=20, help='Timed rounds per codec')
+    
     # Restore command
     restore_parser = subparsers.add_parser('restore', help='Restore from backup')
     restore_parser.add_argument('backup_file', help='Backup file to restore from')
@@ -167,6 +283,8 @@ def main():
         create_backup()
     elif args.command == 'backups':
         list_backups()
+    elif args.command == 'benchmark':
+        benchmark_compression(args.repeat, args.rounds)
     elif args.command == 'restore':
         restore_backup(args.backup_file)
     else:
@@ -1,11 +1,16 @@
 import subprocess
+import gzip
 import json
+import lzma
 import os
 import shutil
+from contextlib import contextmanager
 
 TASKS_FILE = 'tasks.json'
 SEED_FILE = 'data/tasks_seed.json'
 TEST_DATA_FILE = 'data/test_data.json'
+CATEGORIES_FILE = 'tasks.json.categories.json'
+CONFIG_FILE = 'config.json'
 
 def reset_tasks():
     shutil.copy(SEED_FILE, TASKS_FILE)
@@ -16,12 +21,62 @@ def reset_to_test_data():
 def run_cmd(args):
     return subprocess.run(['python', 'app/todo.py'] + args, capture_output=True, text=True)
 
+def read_tasks(path=TASKS_FILE, opener=open):
+    """Read a tasks file, decoding the category dictionary format if present"""
+    with opener(path, 'rt') as f:
+        data = json.load(f)
+    if isinstance(data, list):
+        return data
+    names = data['categories']
+    return [dict(t, category=names[t['category']]) if 'category' in t else t for t in data['tasks']]
+
+def run_data_cmd(args):
+    return subprocess.run(['python', 'data_management.py'] + args, capture_output=True, text=True)
+
+def remove_files(*paths):
+    for path in paths:
+        if os.path.exists(path):
+            os.remove(path)
+
+@contextmanager
+def temporary_config(config, *cleanup_files):
+    """Use a test config.json, restoring any existing one and removing test files afterwards"""
+    previous = None
+    if os.path.exists(CONFIG_FILE):
+        with open(CONFIG_FILE) as f:
+            previous = f.read()
+    with open(CONFIG_FILE, 'w') as f:
+        json.dump(config, f)
+    try:
+        yield
+    finally:
+        remove_files(*cleanup_files)
+        for path in cleanup_files:
+            remove_files(path + '.categories.json')
+        if previous is None:
+            remove_files(CONFIG_FILE)
+        else:
+            with open(CONFIG_FILE, 'w') as f:
+                f.write(previous)
+
+def read_config():
+    with open(CONFIG_FILE) as f:
+        return json.load(f)
+
+def zstd_available():
+    for module in ('compression.zstd', 'zstandard'):
+        try:
+            __import__(module)
+            return True
+        except ImportError:
+            pass
+    return False
+
 def test_add():
     reset_tasks()
     result = run_cmd(['add', 'Test task', 'TestCat'])
     assert 'Added task' in result.stdout
-    with open(TASKS_FILE) as f:
-        tasks = json.load(f)
+    tasks = read_tasks()
     assert any(t['description'] == 'Test task' and t['category'] == 'TestCat' for t in tasks)
     print('✓ test_add passed')
 
@@ -29,8 +84,7 @@ def test_remove():
     reset_tasks()
     result = run_cmd(['remove', '1'])
     assert 'Removed task' in result.stdout
-    with open(TASKS_FILE) as f:
-        tasks = json.load(f)
+    tasks = read_tasks()
     assert not any(t['id'] == 1 for t in tasks)
     print('✓ test_remove passed')
 
@@ -51,8 +105,7 @@ def test_add_with_special_characters():
     reset_tasks()
     result = run_cmd(['add', 'Task with @#$% symbols', 'Special'])
     assert 'Added task' in result.stdout
-    with open(TASKS_FILE) as f:
-        tasks = json.load(f)
+    tasks = read_tasks()
     assert any('@#$%' in t['description'] for t in tasks)
     print('✓ test_add_with_special_characters passed')
 
@@ -87,22 +140,19 @@ def test_multiple_adds():
     run_cmd(['add', 'Second task', 'Test'])
     run_cmd(['add', 'Third task', 'Test'])
     
-    with open(TASKS_FILE) as f:
-        tasks = json.load(f)
+    tasks = read_tasks()
     test_tasks = [t for t in tasks if t['category'] == 'Test']
     assert len(test_tasks) >= 3
     print('✓ test_multiple_adds passed')
 
 def test_id_auto_increment():
     reset_tasks()
-    with open(TASKS_FILE) as f:
-        initial_tasks = json.load(f)
+    initial_tasks = read_tasks()
     max_id = max(t['id'] for t in initial_tasks)
     
     run_cmd(['add', 'New task', 'Test'])
     
-    with open(TASKS_FILE) as f:
-        tasks = json.load(f)
+    tasks = read_tasks()
     new_task = next(t for t in tasks if t['description'] == 'New task')
     assert new_task['id'] == max_id + 1
     print('✓ test_id_auto_increment passed')
@@ -119,6 +169,226 @@ def test_unicode_support():
     assert 'café' in result.stdout
     print('✓ test_unicode_support passed')
 
+def test_category_index_counts():
+    reset_tasks()
+    run_cmd(['add', 'Indexed task', 'IndexCat'])
+    run_cmd(['add', 'Another indexed task', 'indexcat'])
+    with open(CATEGORIES_FILE) as f:
+        index = json.load(f)
+    assert index['categories']['indexcat']['name'] == 'IndexCat'
+    assert index['categories']['indexcat']['count'] == 2
+    
+    tasks = read_tasks()
+    for t in tasks:
+        if t['category'].lower() == 'indexcat':
+            run_cmd(['remove', str(t['id'])])
+    with open(CATEGORIES_FILE) as f:
+        index = json.load(f)
+    assert 'indexcat' not in index['categories']
+    print('✓ test_category_index_counts passed')
+
+def test_category_index_rebuilt_after_reset():
+    reset_tasks()
+    run_cmd(['add', 'Soon to be reset', 'Ephemeral'])
+    reset_to_test_data()
+    result = run_cmd(['list', '--category', 'Ephemeral'])
+    assert 'No tasks found' in result.stdout
+    result = run_cmd(['list', '--category', 'unicode'])
+    assert 'café' in result.stdout
+    print('✓ test_category_index_rebuilt_after_reset passed')
+
+def test_categories_stored_once():
+    reset_tasks()
+    run_cmd(['add', 'Another work task', 'Work'])
+    with open(TASKS_FILE) as f:
+        data = json.load(f)
+    assert len(data['categories']) == len(set(data['categories']))
+    assert all(isinstance(t['category'], int) for t in data['tasks'])
+    tasks = read_tasks()
+    assert sum(t['category'] == 'Work' for t in tasks) == 4
+    assert os.path.getsize(TASKS_FILE) < len(json.dumps(tasks, indent=2))
+    print('✓ test_categories_stored_once passed')
+
+def test_category_index_detects_same_size_edit():
+    reset_tasks()
+    run_cmd(['add', 'Edited outside', 'Alpha'])
+    stat = os.stat(TASKS_FILE)
+    with open(TASKS_FILE) as f:
+        content = f.read()
+    with open(TASKS_FILE, 'w') as f:
+        f.write(content.replace('"Alpha"', '"Omega"'))
+    # Keep the original timestamps, as cp -p or rsync -t would
+    os.utime(TASKS_FILE, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    result = run_cmd(['list', '--category', 'Omega'])
+    assert 'Edited outside' in result.stdout
+    print('✓ test_category_index_detects_same_size_edit passed')
+
+def test_info_uses_index_after_reset():
+    reset_tasks()
+    if os.path.exists(CATEGORIES_FILE):
+        os.remove(CATEGORIES_FILE)
+    run_data_cmd(['seed'])
+    with open(CATEGORIES_FILE) as f:
+        index = json.load(f)
+    assert index['categories']['work']['count'] == 3
+    print('✓ test_info_uses_index_after_reset passed')
+
+def test_read_only_commands_do_not_write_index():
+    reset_tasks()
+    if os.path.exists(CATEGORIES_FILE):
+        os.remove(CATEGORIES_FILE)
+    result = run_cmd(['list', '--category', 'Work'])
+    assert 'Finish project report' in result.stdout
+    subprocess.run(['python', 'data_management.py', 'info'], capture_output=True, text=True)
+    assert not os.path.exists(CATEGORIES_FILE)
+    assert not any(f.endswith('.categories.json') for f in os.listdir('data'))
+    print('✓ test_read_only_commands_do_not_write_index passed')
+
+def test_remove_task_without_category():
+    with open(TASKS_FILE, 'w') as f:
+        json.dump([{'id': 1, 'description': 'No category'}], f)
+    result = run_cmd(['remove', '1'])
+    assert 'Removed task 1' in result.stdout
+    print('✓ test_remove_task_without_category passed')
+
+def test_compressed_tasks_file():
+    compressed_file = 'tasks_compressed_test.json.gz'
+    with temporary_config({'tasks_file': compressed_file}, compressed_file):
+        run_cmd(['add', 'Compressed task', 'Zip'])
+        tasks = read_tasks(compressed_file, gzip.open)
+        assert any(t['description'] == 'Compressed task' for t in tasks)
+        result = run_cmd(['list', '--category', 'zip'])
+        assert 'Compressed task' in result.stdout
+    print('✓ test_compressed_tasks_file passed')
+
+def test_xz_tasks_file():
+    compressed_file = 'tasks_compressed_test.json.xz'
+    with temporary_config({'tasks_file': compressed_file}, compressed_file):
+        run_cmd(['add', 'Xz task', 'Xz'])
+        tasks = read_tasks(compressed_file, lzma.open)
+        assert any(t['description'] == 'Xz task' for t in tasks)
+        result = run_cmd(['list'])
+        assert 'Xz task' in result.stdout
+    print('✓ test_xz_tasks_file passed')
+
+def test_configure_compression_converts_file():
+    plain_file = 'tasks_convert_test.json'
+    compressed_file = plain_file + '.gz'
+    shutil.copy(SEED_FILE, plain_file)
+    with temporary_config({'tasks_file': plain_file}, plain_file, compressed_file):
+        result = run_cmd(['configure', '--setting', 'compression', '--value', 'gzip'])
+        assert 'Converted' in result.stdout
+        assert read_config()['tasks_file'] == compressed_file
+        assert not os.path.exists(plain_file)
+        tasks = read_tasks(compressed_file, gzip.open)
+        with open(SEED_FILE) as f:
+            assert tasks == json.load(f)
+        
+        # Converting back must not overwrite an existing file
+        shutil.copy(SEED_FILE, plain_file)
+        result = run_cmd(['configure', '--setting', 'compression', '--value', 'none'])
+        assert 'already exists' in result.stdout
+        assert read_config()['tasks_file'] == compressed_file
+    print('✓ test_configure_compression_converts_file passed')
+
+def test_restore_plain_backup_into_compressed_file():
+    reset_tasks()
+    result = run_data_cmd(['backup'])
+    backup_file = result.stdout.split('Backup created: ')[1].strip()
+    compressed_file = 'tasks_restore_test.json.gz'
+    with temporary_config({'tasks_file': compressed_file}, compressed_file, backup_file):
+        assert backup_file.endswith('.json')
+        run_data_cmd(['restore', backup_file])
+        tasks = read_tasks(compressed_file, gzip.open)
+        with open(SEED_FILE) as f:
+            assert tasks == json.load(f)
+        
+        result = run_data_cmd(['backup'])
+        compressed_backup = result.stdout.split('Backup created: ')[1].strip()
+        assert compressed_backup.endswith('.json.gz')
+        remove_files(compressed_backup)
+    print('✓ test_restore_plain_backup_into_compressed_file passed')
+
+def write_corrupt_gzip(path):
+    with open(SEED_FILE) as f:
+        content = f.read()
+    with gzip.open(path, 'wt') as f:
+        f.write(content)
+    with open(path, 'rb') as f:
+        data = bytearray(f.read())
+    # Damage the deflate body, past the header and stored file name
+    middle = len(data) // 2
+    for i in range(middle, middle + 16):
+        data[i] ^= 0xFF
+    with open(path, 'wb') as f:
+        f.write(data)
+
+def write_truncated_xz(path):
+    with open(SEED_FILE) as f:
+        content = f.read()
+    with lzma.open(path, 'wt') as f:
+        f.write(content)
+    with open(path, 'rb') as f:
+        data = f.read()
+    with open(path, 'wb') as f:
+        f.write(data[:len(data) // 2])
+
+def test_corrupt_compressed_tasks_file():
+    for path, corrupt in (('tasks_corrupt_test.json.gz', write_corrupt_gzip),
+                          ('tasks_corrupt_test.json.xz', write_truncated_xz)):
+        with temporary_config({'tasks_file': path}, path):
+            corrupt(path)
+            for args in (['list'], ['list', '--category', 'Work'], ['add', 'Lost', 'Test']):
+                result = run_cmd(args)
+                assert 'cannot read tasks file' in result.stdout
+                assert result.returncode == 1
+                assert 'Traceback' not in result.stderr
+            result = run_data_cmd(['info'])
+            assert 'Cannot read file' in result.stdout
+            assert 'Traceback' not in result.stderr
+    print('✓ test_corrupt_compressed_tasks_file passed')
+
+def test_failed_conversion_leaves_no_partial_file():
+    compressed_file = 'tasks_convert_fail_test.json.gz'
+    plain_file = 'tasks_convert_fail_test.json'
+    with temporary_config({'tasks_file': compressed_file}, compressed_file, plain_file):
+        write_corrupt_gzip(compressed_file)
+        before = set(os.listdir('.'))
+        # A retry must fail the same way, not trip over a leftover file
+        for _ in range(2):
+            result = run_cmd(['configure', '--setting', 'compression', '--value', 'none'])
+            assert 'could not convert' in result.stdout
+            assert 'already exists' not in result.stdout
+            assert 'Traceback' not in result.stderr
+        assert set(os.listdir('.')) == before
+        assert read_config()['tasks_file'] == compressed_file
+        assert os.path.exists(compressed_file)
+    print('✓ test_failed_conversion_leaves_no_partial_file passed')
+
+def test_restore_corrupt_backup_keeps_tasks():
+    reset_tasks()
+    backup_file = 'tasks_backup_corrupt_test.json.gz'
+    with temporary_config({'tasks_file': TASKS_FILE}, backup_file):
+        write_corrupt_gzip(backup_file)
+        result = run_data_cmd(['restore', backup_file])
+        assert 'Cannot read file' in result.stdout
+        assert 'Restored' not in result.stdout
+        assert any(t['description'] == 'Buy groceries' for t in read_tasks())
+    print('✓ test_restore_corrupt_backup_keeps_tasks passed')
+
+def test_configure_zstd_when_unavailable():
+    tasks_file = 'tasks_zstd_test.json'
+    with temporary_config({'tasks_file': tasks_file}, tasks_file, tasks_file + '.zst'):
+        result = run_cmd(['configure', '--setting', 'compression', '--value', 'zstd'])
+        if zstd_available():
+            assert read_config()['tasks_file'] == tasks_file + '.zst'
+        else:
+            assert 'Error' in result.stdout
+            assert read_config()['tasks_file'] == tasks_file
+            result = run_cmd(['add', 'Still works', 'Test'])
+            assert 'Added task' in result.stdout
+    print('✓ test_configure_zstd_when_unavailable passed')
+
 if __name__ == '__main__':
     # Save a copy of the seed data for test resets
     if not os.path.exists(SEED_FILE):
@@ -140,6 +410,21 @@ if __name__ == '__main__':
     test_id_auto_increment()
     test_with_test_data()
     test_unicode_support()
+    test_category_index_counts()
+    test_category_index_rebuilt_after_reset()
+    test_categories_stored_once()
+    test_category_index_detects_same_size_edit()
+    test_info_uses_index_after_reset()
+    test_read_only_commands_do_not_write_index()
+    test_remove_task_without_category()
+    test_compressed_tasks_file()
+    test_xz_tasks_file()
+    test_configure_compression_converts_file()
+    test_restore_plain_backup_into_compressed_file()
+    test_corrupt_compressed_tasks_file()
+    test_failed_conversion_leaves_no_partial_file()
+    test_restore_corrupt_backup_keeps_tasks()
+    test_configure_zstd_when_unavailable()
     
     print("=" * 50)
     print("🎉 All tests passed!") 
\ No newline at end of file